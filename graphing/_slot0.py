@@ -0,0 +1,223 @@
+"""Uniswap v4 slot0 price reads shared by findPricesAndTimestamps.py and findPricesAndTimestamps_BWORK.py"""
+import logging
+import requests
+import shelve
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RPC_URL = "https://mainnet.base.org"
+# One keep-alive connection pool shared by web3 calls and the JSON-RPC batches
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=64, pool_maxsize=64, pool_block=False))
+
+Q192 = 2 ** 192
+# Decoding constants, built once instead of on every slot0 decode
+INT24_SIGN_BIT = 1 << 23
+INT24_RANGE = 1 << 24
+WETH_USDC_DECIMALS_SCALE = 10 ** 12  # WETH has 18 decimals, USDC has 6
+
+BLOCK_TS_CACHE_FILE = "block_ts_cache.db"
+_ts_cache = shelve.open(BLOCK_TS_CACHE_FILE)
+_ts_cache_lock = threading.Lock()
+
+POOL_MANAGER = "0x498581fF718922c3f8e6A244956aF099B2652b2b"
+BWORK_WETH_SLOT = '0xd66bf39be2869094cf8d2d31edffab51dc8326eadf3c7611d397d156993996da'
+WETH_USD_SLOT = '0xe570f6e770bf85faa3d1dbee2fa168b56036a048a7939edbcd02d7ebddf3f948'
+# PoolManager.extsload(bytes32[]) returns both pools' slot0 words from a single eth_call
+EXTSLOAD_SELECTOR = "0xdbd035ff"
+SLOT0_CALLDATA = (
+    EXTSLOAD_SELECTOR
+    + f"{32:064x}"  # offset of the bytes32[] argument
+    + f"{2:064x}"  # array length
+    + BWORK_WETH_SLOT[2:]
+    + WETH_USD_SLOT[2:]
+)
+SLOT0_BATCH_SIZE = 50  # blocks per JSON-RPC batch request (up to 2 calls per block)
+MAX_WORKERS = 16  # concurrent RPC requests
+# The public endpoint meters JSON-RPC calls, not HTTP requests, so the limit counts every call in a batch
+RPC_CALLS_PER_SECOND = 8  # shared across all worker threads
+RPC_BURST_CALLS = 2 * SLOT0_BATCH_SIZE  # one full slot0 batch may go out at once
+
+class RateLimiter:
+    """Token bucket of JSON-RPC calls shared by every worker thread so the pool stays under the RPC rate limit"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, n=1):
+        """Block until n calls may be sent"""
+        # A batch larger than the bucket goes out once the bucket is full and leaves it in debt
+        needed = min(n, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= needed:
+                    self.tokens -= n
+                    return
+                wait = (needed - self.tokens) / self.rate
+            time.sleep(wait)
+
+rate_limiter = RateLimiter(rate=RPC_CALLS_PER_SECOND, capacity=RPC_BURST_CALLS)
+
+class RpcError(Exception):
+    """Error reply to one call of a JSON-RPC batch"""
+
+def rpc_batch(calls, session=session, retries=5, delay=2):
+    """
+    Send (method, params) pairs as a single JSON-RPC batch and return the results in order
+
+    A call the node answers with an error gets an RpcError in its place, so one bad call does not
+    fail the rest of the batch; only transport failures are retried.
+    """
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    attempt = 0
+    while attempt < retries:
+        try:
+            rate_limiter.acquire(len(calls))
+            response = session.post(RPC_URL, json=payload, timeout=30)
+            response.raise_for_status()
+            replies = {reply["id"]: reply for reply in response.json()}
+            results = []
+            for i in range(len(calls)):
+                reply = replies[i]
+                if "error" in reply:
+                    results.append(RpcError(reply["error"]))
+                else:
+                    results.append(reply["result"])
+            return results
+        except Exception as e:
+            logger.warning("Retry %d/%d failed: %s", attempt + 1, retries, e)
+            attempt += 1
+            time.sleep(delay)
+    raise RuntimeError(f"Failed JSON-RPC batch of {len(calls)} calls after {retries} retries")
+
+def unpack_slot0(data):
+    # slot0 fields are byte aligned in the 32-byte word, so slice instead of shifting a 256-bit int
+    sqrtPriceX96 = int.from_bytes(data[12:32], "big")
+    tick_raw = int.from_bytes(data[9:12], "big")
+    # Interpret int24 (signed)
+    tick = tick_raw - INT24_RANGE if tick_raw & INT24_SIGN_BIT else tick_raw
+    protocolFee = int.from_bytes(data[6:9], "big")
+    lpFee = int.from_bytes(data[3:6], "big")
+    return sqrtPriceX96, tick, protocolFee, lpFee
+
+def cached_block_timestamp(block):
+    """Return the cached timestamp for block, or None if it has not been fetched before"""
+    with _ts_cache_lock:
+        return _ts_cache.get(str(block))
+
+def cache_block_timestamp(block, timestamp):
+    # Block timestamps never change, so they are persisted across runs
+    with _ts_cache_lock:
+        _ts_cache[str(block)] = timestamp
+        _ts_cache.sync()
+
+def slot0_call(block):
+    """JSON-RPC call reading both pool slot0 words at the given block"""
+    return ("eth_call", [{"to": POOL_MANAGER, "data": SLOT0_CALLDATA}, hex(block)])
+
+def block_header_call(block):
+    return ("eth_getBlockByNumber", [hex(block), False])
+
+def decode_slot0_words(result):
+    """Split the abi-encoded bytes32[2] returned by extsload into the two 32-byte slot0 words"""
+    data = bytes.fromhex(result[2:])  # words 0 and 1 are the array offset and length
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("slot0 words: 0x%s 0x%s", data[64:96].hex(), data[96:128].hex())
+    return data[64:96], data[96:128]
+
+def slot0_price(block, bwork_weth_storage, weth_usd_storage):
+    # A run decodes a few thousand words at most, so read sqrtPriceX96 (the low 20 bytes) in place
+    # here rather than going through unpack_slot0, which is only needed for the debug output
+    bwork_weth_sqrt = int.from_bytes(bwork_weth_storage[12:32], "big")
+    weth_usd_sqrt = int.from_bytes(weth_usd_storage[12:32], "big")
+    price = (bwork_weth_sqrt * bwork_weth_sqrt) / Q192
+    price2 = (weth_usd_sqrt * weth_usd_sqrt) / Q192 * WETH_USDC_DECIMALS_SCALE
+    actual_price = price2 * (1/price)
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("--- Decoding data for block %d ---", block)
+        # BWORKWETH POOL
+        sqrtPriceX96, tick, protocolFee, lpFee = unpack_slot0(bwork_weth_storage)
+        logger.debug("BWORK/WETH - sqrtPriceX96: %d", sqrtPriceX96)
+        logger.debug("BWORK/WETH - tick: %d, protocol fee: %d, LP fee: %d", tick, protocolFee, lpFee)
+        logger.debug("BWORK/WETH - Price: %s", price)
+        # WETHUSD POOL
+        sqrtPriceX96, tick, protocolFee, lpFee = unpack_slot0(weth_usd_storage)
+        logger.debug("WETH/USD - sqrtPriceX96: %d", sqrtPriceX96)
+        logger.debug("WETH/USD - tick: %d, protocol fee: %d, LP fee: %d", tick, protocolFee, lpFee)
+        logger.debug("WETH/USD - Price2: %s", price2)
+        logger.debug("Actual Price of BWORK: %s", actual_price)
+    return actual_price
+
+def getSlot0_chunk(chunk, session=session, known_timestamps=None):
+    """
+    Return (price, timestamp) for each block in chunk using a single JSON-RPC batch request
+
+    known_timestamps, if given, holds the chunk's timestamps already read by the caller; they are
+    used as-is and not cached. A block whose calls fail or whose slot0 words cannot be priced gets
+    None instead.
+    """
+    logger.info("Fetching data for blocks %d to %d", chunk[0], chunk[-1])
+    calls = []
+    timestamps = []
+    for i, block in enumerate(chunk):
+        calls.append(slot0_call(block))
+        # Only ask for the block header when its timestamp is not known or cached yet
+        timestamp = known_timestamps[i] if known_timestamps is not None else cached_block_timestamp(block)
+        if timestamp is None:
+            calls.append(block_header_call(block))
+        timestamps.append(timestamp)
+    replies = iter(rpc_batch(calls, session))
+    results = []
+    for block, timestamp in zip(chunk, timestamps):
+        slot0_result = next(replies)
+        header = next(replies) if timestamp is None else None
+        try:
+            if isinstance(slot0_result, RpcError):
+                raise slot0_result
+            if isinstance(header, RpcError):
+                raise header
+            if header is not None:
+                timestamp = int(header["timestamp"], 16)
+                cache_block_timestamp(block, timestamp)
+            bwork_weth_storage, weth_usd_storage = decode_slot0_words(slot0_result)
+            price = slot0_price(block, bwork_weth_storage, weth_usd_storage)
+        except (RpcError, ArithmeticError, ValueError, TypeError, KeyError) as e:
+            logger.warning("Skipping block %d: %s", block, e)
+            results.append(None)
+            continue
+        results.append((price, timestamp))
+    return results
+
+def split_into_chunks(blocks):
+    return [blocks[start:start + SLOT0_BATCH_SIZE] for start in range(0, len(blocks), SLOT0_BATCH_SIZE)]
+
+def getSlot0_batch(blocks, session=session):
+    """Return (price, timestamp) for each block, fetching SLOT0_BATCH_SIZE blocks per request across MAX_WORKERS threads"""
+    chunks = split_into_chunks(blocks)
+    results = []
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        for chunk_results in executor.map(getSlot0_chunk, chunks, [session] * len(chunks)):
+            results.extend(chunk_results)
+    return results
+
+def getSlot0(block, session=session, timestamp=None):
+    result = getSlot0_chunk([block], session, None if timestamp is None else [timestamp])[0]
+    if result is None:
+        raise RuntimeError(f"Failed to read slot0 at block {block}")
+    return result
+
@@ -1,61 +1,149 @@
 from web3 import Web3
+import bisect
+import io
+import logging
+import numpy as np
 import time
-import json
+from concurrent.futures import ThreadPoolExecutor
+import orjson
 import os
+import tempfile
 from datetime import datetime, timezone
 
-RPC_URL = "https://mainnet.base.org"
-w3 = Web3(Web3.HTTPProvider(RPC_URL))
-Q192 = 2 ** 192
+from _slot0 import (
+    MAX_WORKERS,
+    RPC_URL,
+    RpcError,
+    block_header_call,
+    cache_block_timestamp,
+    cached_block_timestamp,
+    getSlot0,
+    getSlot0_chunk,
+    rate_limiter,
+    rpc_batch,
+    session,
+    split_into_chunks,
+)
+
+# web3 shares the keep-alive connection pool that the JSON-RPC batches use
+w3 = Web3(Web3.HTTPProvider(RPC_URL, session=session, request_kwargs={"timeout": 10}))
+
+HEADER_BATCH_SIZE = 100  # block headers per JSON-RPC batch request
+SPARSE_INDEX_STEP = 10000  # blocks between samples in the sparse timestamp index
+TIMESTAMP_TOLERANCE = 30 * 60  # how close a historical block must be to its target time
 
 # File to store the data
 DATA_FILE = "price_data_bwork.json"
 MAX_DATA_POINTS = 4 * 30  # 30 days worth of 4 daily intervals
+MONITOR_INTERVAL = 5 * 60  # longest sleep between current price checks
+PRICE_CHANGE_THRESHOLD = 0.001  # relative move needed before a current price update is saved
 
 # Define the target times for data collection (in UTC)
 TARGET_HOURS = [0, 6, 12, 18]  # Midnight, 6am, noon, 6pm
+TARGET_MINUTES_OF_DAY = np.array([hour * 60 for hour in TARGET_HOURS])
 
 # File paths
 LOCAL_DATA_FILE = "price_data_bwork.json"
 WEB_DATA_FILE = "/var/www/html/data.bzerox.org/graph/price_data_bwork.json"
+LOCAL_NPZ_FILE = "price_data_bwork.npz"  # compressed binary copy of the local history, loaded in preference to JSON
+
+_last_web_rows = None  # rows most recently written to WEB_DATA_FILE
+
+WRITE_BUFFER_SIZE = 1 << 16  # one large write instead of many small ones on a network-mounted web root
 
-def save_data(timestamps, blocks, prices):
-    """Save the arrays to JSON files in both local and web directories"""
-    data = {
+def write_atomic(path, payload):
+    """Write payload through a temporary file and os.replace so readers never see a partial file"""
+    # The temporary file must sit next to path for os.replace to be atomic; no fsync, since
+    # losing one monitor interval on a crash is acceptable
+    with tempfile.NamedTemporaryFile('wb', buffering=WRITE_BUFFER_SIZE, dir=os.path.dirname(path) or ".", delete=False) as f:
+        tmp_path = f.name
+        try:
+            f.write(payload)
+        except BaseException:
+            f.close()
+            os.remove(tmp_path)
+            raise
+    # NamedTemporaryFile creates the file owner-only; the web server needs to read it
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+def save_data(data):
+    """Save the (timestamp, block, price) rows as parallel arrays to JSON files in both local and web directories"""
+    global _last_web_rows
+    timestamps, blocks, prices = (list(column) for column in zip(*data)) if data else ([], [], [])
+    payload = {
         "timestamps": timestamps,
         "blocks": blocks,
         "prices": prices,
         "last_updated": time.time()
     }
+    # Serialize once and write the same bytes to both locations
+    payload = orjson.dumps(payload, option=orjson.OPT_INDENT_2)
     
     # Save locally
     try:
-        with open(LOCAL_DATA_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
+        write_atomic(LOCAL_DATA_FILE, payload)
         print(f"Data saved locally to {LOCAL_DATA_FILE}")
     except Exception as e:
         print(f"Error saving local file: {e}")
     
+    # Binary sidecar for fast startup; the JSON files stay the format the website reads
+    try:
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            ts=np.asarray(timestamps, dtype=np.int64),
+            blk=np.asarray(blocks, dtype=np.int64),
+            px=np.asarray(prices, dtype=np.float64),
+            last_updated=np.float64(time.time()),
+        )
+        write_atomic(LOCAL_NPZ_FILE, buffer.getvalue())
+    except Exception as e:
+        print(f"Error saving binary file: {e}")
+    
+    # The payload always carries a fresh last_updated, so compare the rows to spot an unchanged web copy
+    if data == _last_web_rows:
+        print("Web data unchanged, skipping web directory write")
+        return
+    
     # Save to web directory
     try:
         # Create directory if it doesn't exist
         web_dir = os.path.dirname(WEB_DATA_FILE)
         os.makedirs(web_dir, exist_ok=True)
         
-        with open(WEB_DATA_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
+        write_atomic(WEB_DATA_FILE, payload)
+        _last_web_rows = list(data)
         print(f"Data saved to web directory: {WEB_DATA_FILE}")
     except Exception as e:
         print(f"Error saving web file: {e}")
         print(f"Make sure you have write permissions to {web_dir}")
 
 def load_data():
-    """Load the arrays from JSON file, try local first, then web directory"""
-    # Try local file first
+    """Load the data as sorted (timestamp, block, price) rows, try the binary sidecar, then local, then web directory"""
+    # Prefer the binary sidecar unless the local JSON was written after it
+    if os.path.exists(LOCAL_NPZ_FILE) and (
+        not os.path.exists(LOCAL_DATA_FILE) or os.path.getmtime(LOCAL_NPZ_FILE) >= os.path.getmtime(LOCAL_DATA_FILE)
+    ):
+        try:
+            with np.load(LOCAL_NPZ_FILE) as npz:
+                timestamps = npz["ts"].tolist()
+                blocks = npz["blk"].tolist()
+                prices = npz["px"].tolist()
+                last_updated = float(npz["last_updated"])
+            print(f"Loaded {len(timestamps)} data points from {LOCAL_NPZ_FILE}")
+            if last_updated > 0:
+                last_updated_dt = datetime.fromtimestamp(last_updated, tz=timezone.utc)
+                print(f"Last updated: {last_updated_dt.strftime('%Y-%m-%d %H:%M:%S UTC')}")
+            return sorted(zip(timestamps, blocks, prices))
+        except Exception as e:
+            print(f"Error loading binary data file: {e}")
+    
+    # Try local file next
     if os.path.exists(LOCAL_DATA_FILE):
         try:
-            with open(LOCAL_DATA_FILE, 'r') as f:
-                data = json.load(f)
+            with open(LOCAL_DATA_FILE, 'rb') as f:
+                data = orjson.loads(f.read())
             timestamps = data.get("timestamps", [])
             blocks = data.get("blocks", [])
             prices = data.get("prices", [])
@@ -64,15 +152,15 @@ def load_data():
             if last_updated > 0:
                 last_updated_dt = datetime.fromtimestamp(last_updated, tz=timezone.utc)
                 print(f"Last updated: {last_updated_dt.strftime('%Y-%m-%d %H:%M:%S UTC')}")
-            return timestamps, blocks, prices
+            return sorted(zip(timestamps, blocks, prices))
         except Exception as e:
             print(f"Error loading local data file: {e}")
     
     # Try web file if local doesn't exist
     elif os.path.exists(WEB_DATA_FILE):
         try:
-            with open(WEB_DATA_FILE, 'r') as f:
-                data = json.load(f)
+            with open(WEB_DATA_FILE, 'rb') as f:
+                data = orjson.loads(f.read())
             timestamps = data.get("timestamps", [])
             blocks = data.get("blocks", [])
             prices = data.get("prices", [])
@@ -81,23 +169,30 @@ def load_data():
             if last_updated > 0:
                 last_updated_dt = datetime.fromtimestamp(last_updated, tz=timezone.utc)
                 print(f"Last updated: {last_updated_dt.strftime('%Y-%m-%d %H:%M:%S UTC')}")
-            return timestamps, blocks, prices
+            return sorted(zip(timestamps, blocks, prices))
         except Exception as e:
             print(f"Error loading web data file: {e}")
     
     print("No existing data file found in either location, starting fresh")
-    return [], [], []
+    return []
+
+def target_time_mask(timestamps, tolerance_minutes=30):
+    """Boolean array marking which timestamps are close to a target time (midnight, 6am, noon, 6pm)"""
+    # UTC minute of day straight from the epoch seconds, no datetime objects needed
+    minute_of_day = (np.asarray(timestamps, dtype=np.int64) % 86400) // 60
+    minutes_from_target = np.abs(minute_of_day[:, None] - TARGET_MINUTES_OF_DAY[None, :])
+    # Handle wrap-around (e.g., 23:45 is close to 00:00)
+    minutes_from_target = np.minimum(minutes_from_target, 24 * 60 - minutes_from_target)
+    return (minutes_from_target <= tolerance_minutes).any(axis=1)
 
 def is_target_time(timestamp, tolerance_minutes=30):
     """Check if a timestamp is close to a target time (midnight, 6am, noon, 6pm)"""
-    dt = datetime.fromtimestamp(timestamp, tz=timezone.utc)
-    hour = dt.hour
-    minute = dt.minute
+    minute_of_day = (timestamp % 86400) // 60
     
     # Check if it's within tolerance of any target hour
     for target_hour in TARGET_HOURS:
         # Calculate minutes from target hour
-        minutes_from_target = abs((hour * 60 + minute) - (target_hour * 60))
+        minutes_from_target = abs(minute_of_day - (target_hour * 60))
         # Handle wrap-around (e.g., 23:45 is close to 00:00)
         minutes_from_target = min(minutes_from_target, 24 * 60 - minutes_from_target)
         
@@ -106,110 +201,48 @@ def is_target_time(timestamp, tolerance_minutes=30):
     
     return False
 
-def clean_data_keep_targets_and_current(timestamps, blocks, prices):
+def clean_data_keep_targets_and_current(data):
     """Keep only target time data points + optionally the most recent non-target point"""
-    if not timestamps:
-        return timestamps, blocks, prices
+    if not data:
+        return data
     
     print("Cleaning data to keep only 6-hour targets + current price...")
     
-    # Separate target time data points from non-target ones
-    target_data = []
-    non_target_data = []
-    
-    for i in range(len(timestamps)):
-        if is_target_time(timestamps[i]):
-            target_data.append((timestamps[i], blocks[i], prices[i]))
-        else:
-            non_target_data.append((timestamps[i], blocks[i], prices[i]))
+    # Separate target time data points from non-target ones in one vectorized pass
+    is_target = target_time_mask([row[0] for row in data])
+    target_data = [row for row, keep in zip(data, is_target) if keep]
+    non_target_data = [row for row, keep in zip(data, is_target) if not keep]
     
     print(f"Found {len(target_data)} target time data points")
     print(f"Found {len(non_target_data)} non-target time data points")
     
-    # Start with all target data points
-    cleaned_timestamps = [item[0] for item in target_data]
-    cleaned_blocks = [item[1] for item in target_data]
-    cleaned_prices = [item[2] for item in target_data]
+    # Start with all target data points (already in chronological order)
+    cleaned_data = target_data
     
     # Add only the most recent non-target data point if it exists
     if non_target_data:
-        # Sort non-target data by timestamp and take the most recent
-        non_target_data.sort(key=lambda x: x[0])
-        most_recent = non_target_data[-1]
-        
-        # Insert in correct chronological position
-        insert_pos = len(cleaned_timestamps)
-        for i, ts in enumerate(cleaned_timestamps):
-            if most_recent[0] < ts:
-                insert_pos = i
-                break
-        
-        cleaned_timestamps.insert(insert_pos, most_recent[0])
-        cleaned_blocks.insert(insert_pos, most_recent[1])
-        cleaned_prices.insert(insert_pos, most_recent[2])
-        
+        bisect.insort(cleaned_data, non_target_data[-1])
         print(f"Kept most recent current price data point")
     
-    print(f"Cleaned data: {len(cleaned_timestamps)} total points (targets + current)")
-    return cleaned_timestamps, cleaned_blocks, cleaned_prices
-
-def get_storage_with_retry(address, slot, block, retries=5, delay=2):
-    attempt = 0
-    while attempt < retries:
-        try:
-            data = w3.eth.getStorageAt(address, slot, block_identifier=block)
-            print("Data: ", data)
-            bytes32_hex = "0x" + data.hex().rjust(64, "0")  # pad to 32 bytes (64 hex chars)
-            print("Data hex: ", bytes32_hex)
-            return int.from_bytes(data, "big")
-        except Exception as e:
-            print(f"Retry {attempt+1}/{retries} failed: {e}")
-            attempt += 1
-            time.sleep(delay)
-    raise RuntimeError(f"Failed to fetch storage slot {slot} after {retries} retries")
-
-def unpack_slot0(packed):
-    sqrtPriceX96 = packed & ((1 << 160) - 1)
-    tick = (packed >> 160) & ((1 << 24) - 1)
-    # Interpret int24 (signed)
-    if tick & (1 << 23):  # negative
-        tick -= (1 << 24)
-    protocolFee = (packed >> 184) & ((1 << 24) - 1)
-    lpFee = (packed >> 208) & ((1 << 24) - 1)
-    return sqrtPriceX96, tick, protocolFee, lpFee
+    print(f"Cleaned data: {len(cleaned_data)} total points (targets + current)")
+    return cleaned_data
 
-def sqrtPriceX96_to_price(sq):
-    return (sq ** 2) / Q192
-
-def getSlot0(block):
-    print(f"\n--- Fetching data for block {block} ---")
-    
-    # BWORKWETH POOL
-    pool_manager = "0x498581fF718922c3f8e6A244956aF099B2652b2b"
-    pool_slot = '0xd66bf39be2869094cf8d2d31edffab51dc8326eadf3c7611d397d156993996da'
-    
-    packed = get_storage_with_retry(pool_manager, pool_slot, block)
-    sqrtPriceX96, tick, protocolFee, lpFee = unpack_slot0(packed)
-    price = sqrtPriceX96_to_price(sqrtPriceX96)
-    print("BWORK/WETH - sqrtPriceX96:", sqrtPriceX96)
-    print("BWORK/WETH - Price:", price)
-    
-    # WETHUSD POOL
-    pool_slot = '0xe570f6e770bf85faa3d1dbee2fa168b56036a048a7939edbcd02d7ebddf3f948'
-    
-    packed = get_storage_with_retry(pool_manager, pool_slot, block)
-    sqrtPriceX96, tick, protocolFee, lpFee = unpack_slot0(packed)
-    price2 = sqrtPriceX96_to_price(sqrtPriceX96) * 10**12
-    print("WETH/USD - Price2:", price2)
-    
-    actual_price = price2 * (1/price)
-    print("Actual Price of BWORK:", actual_price)
-    return actual_price
+def get_block_timestamp(block):
+    """Get a block's timestamp, using the on-disk cache before asking the RPC"""
+    timestamp = cached_block_timestamp(block)
+    if timestamp is None:
+        # The resolver threads probe through here, so share the batches' rate limit
+        rate_limiter.acquire()
+        timestamp = w3.eth.getBlock(block)["timestamp"]
+        cache_block_timestamp(block, timestamp)
+    return timestamp
 
 def get_current_block_and_timestamp():
     """Get the current block number and timestamp"""
     try:
+        rate_limiter.acquire()
         current_block = w3.eth.blockNumber
+        rate_limiter.acquire()
         block_data = w3.eth.getBlock(current_block)
         current_timestamp = block_data["timestamp"]
         return current_block, current_timestamp
@@ -217,44 +250,41 @@ def get_current_block_and_timestamp():
         print(f"Error getting current block: {e}")
         return None, None
 
-def estimate_block_from_timestamp(target_timestamp, current_block, current_timestamp):
-    """Estimate block number from timestamp by calculating actual seconds per block"""
-    try:
-        # Estimate blocks for 24 hours ago (assuming ~2 seconds per block initially)
-        blocks_24h_ago_estimate = int((24 * 60 * 60) / 2)  # ~43200 blocks
-        sample_block_24h_ago = max(1, current_block - blocks_24h_ago_estimate)
-        
-        # Get the actual timestamp for that block
-        sample_block_data = w3.eth.getBlock(sample_block_24h_ago)
-        sample_timestamp_24h_ago = sample_block_data["timestamp"]
-        
-        # Calculate actual seconds per block over the 24 hour period
-        actual_time_diff = current_timestamp - sample_timestamp_24h_ago
-        actual_block_diff = current_block - sample_block_24h_ago
-        
-        if actual_block_diff > 0 and actual_time_diff > 0:
-            seconds_per_block = actual_time_diff / actual_block_diff
-            print(f"Calculated seconds per block: {seconds_per_block:.3f} (over {actual_block_diff} blocks, {actual_time_diff/3600:.1f} hours)")
-        else:
-            # Fallback to 2 seconds if calculation fails
-            seconds_per_block = 2.0
-            print("Using fallback: 2 seconds per block")
-        
-        # Now estimate the target block using actual seconds per block
-        time_diff = current_timestamp - target_timestamp
-        blocks_diff = int(time_diff / seconds_per_block)
-        estimated_block = current_block - blocks_diff
-        
-        return max(1, estimated_block)  # Ensure block number is at least 1
-        
-    except Exception as e:
-        print(f"Error calculating seconds per block: {e}")
-        print("Using fallback estimation of 2 seconds per block")
-        # Fallback to original method
-        time_diff = current_timestamp - target_timestamp
-        blocks_diff = int(time_diff / 2)  # Assuming 2 seconds per block
-        estimated_block = current_block - blocks_diff
-        return max(1, estimated_block)
+def get_block_timestamps(block_numbers):
+    """Get timestamps for many blocks, fetching the uncached ones in JSON-RPC batches"""
+    uncached = [block for block in block_numbers if cached_block_timestamp(block) is None]
+    for start in range(0, len(uncached), HEADER_BATCH_SIZE):
+        chunk = uncached[start:start + HEADER_BATCH_SIZE]
+        replies = rpc_batch([block_header_call(block) for block in chunk])
+        for block, block_data in zip(chunk, replies):
+            if isinstance(block_data, RpcError):
+                raise block_data
+            cache_block_timestamp(block, int(block_data["timestamp"], 16))
+    return [cached_block_timestamp(block) for block in block_numbers]
+
+def build_sparse_index(oldest_timestamp, current_block, current_timestamp):
+    """Sample every SPARSE_INDEX_STEP-th block back to oldest_timestamp, returning ascending (blocks, timestamps)"""
+    # Samples sit on multiples of SPARSE_INDEX_STEP so they stay cached between runs
+    newest_sample = current_block - current_block % SPARSE_INDEX_STEP
+    # First guess at how far back to go assumes ~2 seconds per block; extend if it falls short
+    oldest_sample = current_block - int((current_timestamp - oldest_timestamp) / 2) - SPARSE_INDEX_STEP
+    index_blocks = []
+    index_timestamps = []
+    while True:
+        oldest_sample = max(0, oldest_sample - oldest_sample % SPARSE_INDEX_STEP)
+        sample_blocks = list(range(oldest_sample, newest_sample + 1, SPARSE_INDEX_STEP))
+        index_blocks = sample_blocks + index_blocks
+        index_timestamps = get_block_timestamps(sample_blocks) + index_timestamps
+        if index_timestamps[0] <= oldest_timestamp or oldest_sample == 0:
+            break
+        newest_sample = oldest_sample - SPARSE_INDEX_STEP
+        oldest_sample -= 10 * SPARSE_INDEX_STEP
+    
+    if current_block > index_blocks[-1]:
+        index_blocks.append(current_block)
+        index_timestamps.append(current_timestamp)
+    print(f"Built sparse timestamp index with {len(index_blocks)} samples from block {index_blocks[0]}")
+    return index_blocks, index_timestamps
 
 def get_target_timestamps_for_day(day_timestamp):
     """Get the 4 target timestamps (midnight, 6am, noon, 6pm) for a given day"""
@@ -269,13 +299,17 @@ def get_target_timestamps_for_day(day_timestamp):
     
     return target_timestamps
 
-def get_missing_timestamps(timestamps, current_timestamp, target_days=30):
+EXISTING_TOLERANCE = 30 * 60  # an existing point this close to a target time counts as collected
+
+def get_missing_timestamps(data, current_timestamp, target_days=30):
     """Find all missing target timestamps for the past target_days"""
-    # Convert existing timestamps to set for faster lookup
-    existing_target_times = set()
-    for ts in timestamps:
-        if is_target_time(ts):
-            existing_target_times.add(ts)
+    # Bucket existing target points into EXISTING_TOLERANCE-wide slots; anything within tolerance of
+    # a target lies in the target's slot or one of its two neighbours
+    existing_slots = {}
+    is_target = target_time_mask([row[0] for row in data])
+    for (ts, _, _), keep in zip(data, is_target):
+        if keep:
+            existing_slots.setdefault(ts // EXISTING_TOLERANCE, []).append(ts)
     
     missing_timestamps = []
     
@@ -286,119 +320,131 @@ def get_missing_timestamps(timestamps, current_timestamp, target_days=30):
         
         for target_ts in target_timestamps:
             # Only include timestamps that are in the past and not already collected
-            if target_ts < current_timestamp and target_ts not in existing_target_times:
-                # Allow some tolerance (within 30 minutes) for existing timestamps
-                found_close = False
-                for existing_ts in existing_target_times:
-                    if abs(existing_ts - target_ts) < 30 * 60:  # 30 minutes tolerance
-                        found_close = True
-                        break
-                
-                if not found_close:
-                    missing_timestamps.append(target_ts)
+            if target_ts >= current_timestamp:
+                continue
+            slot = target_ts // EXISTING_TOLERANCE
+            found_close = any(
+                abs(existing_ts - target_ts) < EXISTING_TOLERANCE
+                for neighbour in (slot - 1, slot, slot + 1)
+                for existing_ts in existing_slots.get(neighbour, ())
+            )
+            if not found_close:
+                missing_timestamps.append(target_ts)
     
     # Sort in chronological order
     missing_timestamps.sort()
     return missing_timestamps
 
-def collect_historical_data(timestamps, blocks, prices, target_days=30):
+def resolve_historical_block(target_timestamp, index_blocks, index_timestamps):
+    """Find a block within TIMESTAMP_TOLERANCE of target_timestamp, returning (block, actual_timestamp)"""
+    # Narrow the search to the ~SPARSE_INDEX_STEP blocks between two index samples
+    i = bisect.bisect_left(index_timestamps, target_timestamp)
+    if i == 0:
+        return index_blocks[0], index_timestamps[0]
+    if i == len(index_timestamps):
+        return index_blocks[-1], index_timestamps[-1]
+    low_block, low_timestamp = index_blocks[i - 1], index_timestamps[i - 1]
+    high_block, high_timestamp = index_blocks[i], index_timestamps[i]
+    seconds_per_block = (high_timestamp - low_timestamp) / (high_block - low_block)
+    
+    # Interpolate inside the bracket, then correct with at most one more probe
+    estimated_block = low_block + int((target_timestamp - low_timestamp) / seconds_per_block)
+    if seconds_per_block.is_integer():
+        # A whole number of seconds per block across the bracket means fixed block times (Base makes
+        # one every 2s), so the estimate is exact and needs no probe; getSlot0_chunk still reads the
+        # real timestamp when it fetches the price
+        return estimated_block, low_timestamp + (estimated_block - low_block) * int(seconds_per_block)
+    actual_timestamp = get_block_timestamp(estimated_block)
+    if abs(actual_timestamp - target_timestamp) > TIMESTAMP_TOLERANCE:
+        estimated_block += int((target_timestamp - actual_timestamp) / seconds_per_block)
+        estimated_block = min(max(estimated_block, low_block), high_block)
+        actual_timestamp = get_block_timestamp(estimated_block)
+    
+    return estimated_block, actual_timestamp
+
+def collect_historical_data(data, target_days=30):
     """Collect historical data for missing target times"""
     current_block, current_timestamp = get_current_block_and_timestamp()
     if current_block is None:
-        return timestamps, blocks, prices
+        return data
     
-    missing_timestamps = get_missing_timestamps(timestamps, current_timestamp, target_days)
+    missing_timestamps = get_missing_timestamps(data, current_timestamp, target_days)
     
     if not missing_timestamps:
         print("No missing historical data points found")
-        return timestamps, blocks, prices
+        return data
     
     print(f"Need to collect {len(missing_timestamps)} historical data points")
     
-    for i, target_timestamp in enumerate(missing_timestamps):
-        try:
-            # Estimate block number for this timestamp
-            estimated_block = estimate_block_from_timestamp(target_timestamp, current_block, current_timestamp)
-            
-            # Get actual block data to verify timestamp
-            block_data = w3.eth.getBlock(estimated_block)
-            actual_timestamp = block_data["timestamp"]
-            
-            # Fine-tune block number if needed
-            attempts = 0
-            while abs(actual_timestamp - target_timestamp) > 30 * 60 and attempts < 10:  # 30 minute tolerance
-                if actual_timestamp < target_timestamp:
-                    estimated_block += int((target_timestamp - actual_timestamp) / 2)
-                else:
-                    estimated_block -= int((actual_timestamp - target_timestamp) / 2)
-                
-                block_data = w3.eth.getBlock(estimated_block)
-                actual_timestamp = block_data["timestamp"]
-                attempts += 1
+    index_blocks, index_timestamps = build_sparse_index(missing_timestamps[0], current_block, current_timestamp)
+    
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # Resolve a block for every missing target first so prices can be fetched in batches
+        futures = [
+            executor.submit(resolve_historical_block, target_timestamp, index_blocks, index_timestamps)
+            for target_timestamp in missing_timestamps
+        ]
+        historical_blocks = []
+        for i, (target_timestamp, future) in enumerate(zip(missing_timestamps, futures)):
+            try:
+                block, actual_timestamp = future.result()
+            except Exception as e:
+                print(f"Error resolving historical data point {i+1}: {e}")
+                continue
             
             target_dt = datetime.fromtimestamp(target_timestamp, tz=timezone.utc)
             actual_dt = datetime.fromtimestamp(actual_timestamp, tz=timezone.utc)
             
-            print(f"Collecting historical data {i+1}/{len(missing_timestamps)}: Block {estimated_block}")
+            print(f"Resolved historical data {i+1}/{len(missing_timestamps)}: Block {block}")
             print(f"  Target time: {target_dt.strftime('%Y-%m-%d %H:%M:%S UTC')}")
             print(f"  Actual time: {actual_dt.strftime('%Y-%m-%d %H:%M:%S UTC')}")
             
-            # Get price for this block
-            price = getSlot0(estimated_block)
-            
-            # Insert in correct chronological position
-            insert_pos = 0
-            for j, existing_ts in enumerate(timestamps):
-                if actual_timestamp > existing_ts:
-                    insert_pos = j + 1
-                else:
-                    break
-            
-            timestamps.insert(insert_pos, actual_timestamp)
-            blocks.insert(insert_pos, estimated_block)
-            prices.insert(insert_pos, price)
-            
-            # Save progress every 20 data points
-            if (i + 1) % 20 == 0:
-                save_data(timestamps, blocks, prices)
-                print(f"Progress saved: {i+1}/{len(missing_timestamps)} historical points collected")
+            historical_blocks.append(block)
+        
+        # Fetch prices with one JSON-RPC batch request per SLOT0_BATCH_SIZE blocks
+        chunks = split_into_chunks(historical_blocks)
+        futures = [executor.submit(getSlot0_chunk, chunk, session) for chunk in chunks]
+        collected = 0
+        for chunk, future in zip(chunks, futures):
+            try:
+                results = future.result()
+            except Exception as e:
+                print(f"Error collecting historical prices for blocks {chunk[0]} to {chunk[-1]}: {e}")
+                continue
             
-            # Small delay to avoid overwhelming the RPC
-            time.sleep(0.5)
+            for block, result in zip(chunk, results):
+                if result is None:
+                    print(f"Error collecting historical price for block {block}, skipping")
+                    continue
+                price, actual_timestamp = result
+                # Insert in correct chronological position
+                bisect.insort(data, (actual_timestamp, block, price))
+                collected += 1
             
-        except Exception as e:
-            print(f"Error collecting historical data point {i+1}: {e}")
-            continue
+            # Save progress after every batch
+            save_data(data)
+            print(f"Progress saved: {collected}/{len(historical_blocks)} historical points collected")
     
     print("Historical data collection complete!")
-    return timestamps, blocks, prices
+    return data
+
+def insert_row(data, is_target, row, row_is_target):
+    """Insert row in chronological position, keeping the parallel is_target flags in step"""
+    index = bisect.bisect(data, row)
+    data.insert(index, row)
+    is_target.insert(index, row_is_target)
 
-def update_current_price(timestamps, blocks, prices, current_timestamp, current_block, current_price):
+def update_current_price(data, is_target, current_timestamp, current_block, current_price):
     """Update or add the current price data point, maintaining only targets + 1 current"""
     
     # Remove any existing non-target data points (keep only target times)
-    target_timestamps = []
-    target_blocks = []
-    target_prices = []
-    
-    for i in range(len(timestamps)):
-        if is_target_time(timestamps[i]):
-            target_timestamps.append(timestamps[i])
-            target_blocks.append(blocks[i])
-            target_prices.append(prices[i])
+    target_data = [row for row, keep in zip(data, is_target) if keep]
+    target_flags = [True] * len(target_data)
     
     # Add the current price data point in the correct chronological position
-    insert_pos = len(target_timestamps)
-    for i, ts in enumerate(target_timestamps):
-        if current_timestamp < ts:
-            insert_pos = i
-            break
-    
-    target_timestamps.insert(insert_pos, current_timestamp)
-    target_blocks.insert(insert_pos, current_block)
-    target_prices.insert(insert_pos, current_price)
+    insert_row(target_data, target_flags, (current_timestamp, current_block, current_price), False)
     
-    return target_timestamps, target_blocks, target_prices
+    return target_data, target_flags
 
 def get_next_target_time(current_timestamp):
     """Get the next target time (midnight, 6am, noon, or 6pm)"""
@@ -416,13 +462,11 @@ def get_next_target_time(current_timestamp):
     return next_day_targets[0]  # Midnight of next day
 
 def main():
-    # Load existing data
-    ArrayOfTimestamps, ArrayOfBlocksSearched, ArrayOfActualPrices = load_data()
+    # Load existing data as sorted (timestamp, block, price) rows
+    data = load_data()
     
     # Clean the loaded data first to remove any accumulated non-target data points
-    ArrayOfTimestamps, ArrayOfBlocksSearched, ArrayOfActualPrices = clean_data_keep_targets_and_current(
-        ArrayOfTimestamps, ArrayOfBlocksSearched, ArrayOfActualPrices
-    )
+    data = clean_data_keep_targets_and_current(data)
     
     # Get current block and timestamp
     current_block, current_timestamp = get_current_block_and_timestamp()
@@ -436,20 +480,23 @@ def main():
     
     # Collect any missing historical data
     print("Checking for missing historical data...")
-    ArrayOfTimestamps, ArrayOfBlocksSearched, ArrayOfActualPrices = collect_historical_data(
-        ArrayOfTimestamps, ArrayOfBlocksSearched, ArrayOfActualPrices, target_days=30
-    )
+    data = collect_historical_data(data, target_days=30)
     
     # Save the updated data
-    save_data(ArrayOfTimestamps, ArrayOfBlocksSearched, ArrayOfActualPrices)
+    save_data(data)
     
-    print(f"\nTotal data points: {len(ArrayOfTimestamps)}")
-    if ArrayOfActualPrices:
-        print("Most recent prices:", ArrayOfActualPrices[-5:] if len(ArrayOfActualPrices) >= 5 else ArrayOfActualPrices)
+    # Classify the rows once; the monitor loop keeps the flags in step with data
+    is_target = target_time_mask([row[0] for row in data]).tolist()
+    
+    print(f"\nTotal data points: {len(data)}")
+    if data:
+        print("Most recent prices:", [price for _, _, price in data[-5:]])
     
     # Now enter the monitoring loop
     print("\nEntering monitoring mode...")
+    last_saved_price = data[-1][2] if data else None
     while True:
+        sleep_seconds = MONITOR_INTERVAL
         try:
             # Get current block and timestamp for current price display
             current_block, current_timestamp = get_current_block_and_timestamp()
@@ -462,7 +509,9 @@ def main():
             current_dt = datetime.fromtimestamp(current_timestamp, tz=timezone.utc)
             print(f"\n=== CURRENT PRICE UPDATE ===")
             print(f"Current time: {current_dt.strftime('%Y-%m-%d %H:%M:%S UTC')}")
-            current_price = getSlot0(current_block)
+            # The head timestamp is already known, so this reads slot0 alone and leaves the
+            # head out of the block timestamp cache, which only historical lookups read back
+            current_price, _ = getSlot0(current_block, timestamp=current_timestamp)
             print(f"CURRENT BWORK PRICE: ${current_price:.8f}")
             print(f"Block: {current_block}")
             
@@ -472,49 +521,45 @@ def main():
             if is_current_target:
                 print("🎯 TARGET TIME REACHED! Adding permanent data point...")
                 # Add as a permanent target time data point
-                insert_pos = len(ArrayOfTimestamps)
-                for i, ts in enumerate(ArrayOfTimestamps):
-                    if current_timestamp < ts:
-                        insert_pos = i
-                        break
-                
-                ArrayOfTimestamps.insert(insert_pos, current_timestamp)
-                ArrayOfBlocksSearched.insert(insert_pos, current_block)
-                ArrayOfActualPrices.insert(insert_pos, current_price)
+                insert_row(data, is_target, (current_timestamp, current_block, current_price), True)
                 
                 # Remove oldest data points if over limit
-                while len(ArrayOfTimestamps) > MAX_DATA_POINTS:
-                    ArrayOfTimestamps.pop(0)
-                    ArrayOfBlocksSearched.pop(0)
-                    ArrayOfActualPrices.pop(0)
+                if len(data) > MAX_DATA_POINTS:
+                    del data[:len(data) - MAX_DATA_POINTS]
+                    del is_target[:len(is_target) - MAX_DATA_POINTS]
                 
-                save_data(ArrayOfTimestamps, ArrayOfBlocksSearched, ArrayOfActualPrices)
+                save_data(data)
+                last_saved_price = current_price
                 print("✅ Target time data point saved permanently!")
             
             else:
                 print("📈 Updating current price (temporary until next target time)...")
                 # Update current price, keeping only targets + this current price
-                ArrayOfTimestamps, ArrayOfBlocksSearched, ArrayOfActualPrices = update_current_price(
-                    ArrayOfTimestamps, ArrayOfBlocksSearched, ArrayOfActualPrices,
-                    current_timestamp, current_block, current_price
-                )
-                save_data(ArrayOfTimestamps, ArrayOfBlocksSearched, ArrayOfActualPrices)
-                print("📱 Current price updated (will be replaced until target time)")
+                data, is_target = update_current_price(data, is_target, current_timestamp, current_block, current_price)
+                # Only rewrite the files when the price actually moved
+                if last_saved_price is None or abs(current_price - last_saved_price) / last_saved_price > PRICE_CHANGE_THRESHOLD:
+                    save_data(data)
+                    last_saved_price = current_price
+                    print("📱 Current price updated (will be replaced until target time)")
+                else:
+                    print(f"📱 Price moved less than {PRICE_CHANGE_THRESHOLD:.1%} since last save, skipping write")
             
             # Show next target time info
             next_target_time = get_next_target_time(current_timestamp)
             next_target_dt = datetime.fromtimestamp(next_target_time, tz=timezone.utc)
             time_to_next_target = next_target_time - current_timestamp
+            # Wake up right at the next target instead of up to MONITOR_INTERVAL after it
+            sleep_seconds = min(MONITOR_INTERVAL, max(1, time_to_next_target))
             hours_to_next = time_to_next_target // 3600
             minutes_to_next = (time_to_next_target % 3600) // 60
             
             print(f"Next target time: {next_target_dt.strftime('%Y-%m-%d %H:%M:%S UTC')}")
             print(f"Time until next target: {int(hours_to_next)}h {int(minutes_to_next)}m")
-            print(f"Total stored data points: {len(ArrayOfTimestamps)}")
+            print(f"Total stored data points: {len(data)}")
             
             # Count target vs current data points
-            target_count = sum(1 for ts in ArrayOfTimestamps if is_target_time(ts))
-            current_count = len(ArrayOfTimestamps) - target_count
+            target_count = sum(is_target)
+            current_count = len(data) - target_count
             print(f"  - Target time points: {target_count}")
             print(f"  - Current price points: {current_count}")
             print("=" * 40)
@@ -523,10 +568,11 @@ def main():
             print(f"Error in monitoring loop: {e}")
             print("Continuing monitoring in 5 minutes...")
         
-        # Wait 5 minutes before next check
-        time.sleep(5 * 60)
+        # Wait until the next check (at most 5 minutes)
+        time.sleep(sleep_seconds)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     while True:
         try:
             main()
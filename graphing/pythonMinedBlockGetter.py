@@ -1,12 +1,40 @@
+import aiohttp
+import asyncio
 import json
+import numpy as np
 import os
+import requests
 import time
 import threading
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 from web3 import Web3
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # the standard library json module is used instead
+    orjson = None
+
+def json_dumps_bytes(obj: Any) -> bytes:
+    """Serialize obj to compact JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+# Mint log data words process_logs reads: amount (0), epoch count (1, unused) and challenge (2)
+LOG_DATA_BYTES_USED = 96
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch the stdlib error either way
+json_loads = orjson.loads if orjson is not None else json.loads
+
+class RateLimitError(RuntimeError):
+    """The RPC endpoint answered with HTTP 429 or a JSON-RPC 429 error"""
 
 class EthereumBlockFetcher:
+    # Exact int / int division keeps amounts correctly rounded; multiplying by 1e-18 would not
+    _WEI_PER_ETH = 10 ** 18
+    
     def __init__(self, rpc_url: str = "https://base-sepolia.g.alchemy.com/v2/fTukefKxyH-72aDTEBUHqcad2_SK53CC"):
         """
         Initialize the Ethereum block fetcher
@@ -14,27 +42,48 @@ class EthereumBlockFetcher:
         Args:
             rpc_url: Ethereum RPC endpoint URL
         """
-        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+        self.rpc_url = rpc_url
+        # A pooled keep-alive session, so web3 calls reuse connections for the life of the fetcher
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+        self.w3 = Web3(Web3.HTTPProvider(rpc_url, session=self.session, request_kwargs={'timeout': 30}))
         self.eth_block_start = 30111966
         self.bwork_contract_address = "0x7aDf1927aa0c75Fd054804E9fc6574A56C211AbB"
         self.mint_topic = "0xcf6fbb9dcea7d07263ab4f5c3a92f53af33dffc421d9d121e1c74b307e68189d"
-        self.mined_blocks = []
-        self.previous_challenge = None
+        self.mined_blocks = []  # [block, tx_hash, miner, amount] per mint, oldest first
+        # (first_block_num, tx_hash, miner, index) per challenge change; its -1 marker entry goes
+        # right before mined_blocks[index] when the entries are published
+        self.challenges = []
+        self.previous_challenge: Optional[bytes] = None  # raw 32 bytes; hex only when written out
         self.last_processed_block_file = "last_processed_block.json"
+        # Append-only, one published entry per line (markers included), oldest first; each write ends
+        # with a {"latest_block_number": n} record of the last block it covers
+        self.journal_file = "mined_blocks.ndjson"
+        self.meta_file = "mined_blocks_meta.json"
+        self.journaled_count = 0  # how many mined_blocks entries are already in journal_file
+        self.journaled_block = -1  # last block journal_file covers, -1 until it has any
+        self.dirty = True  # mined_blocks changed since the last save; True so the first run always publishes
         self.running = False
+        self._stop = threading.Event()  # set by stop_scheduler; every wait in the scheduler returns on it
         self.scheduler_thread = None
+        self.max_in_flight = 8  # eth_getLogs batch requests in flight at once, kept low to stay under Alchemy's rate limit
+        self.ranges_per_request = 10  # eth_getLogs calls packed into each JSON-RPC batch request
+        self.target_request_seconds = 2.0  # block ranges are resized so batch requests take about this long
+        self.block_range_ceiling_waves = 50  # waves a block range that failed stays off limits, doubled each time it fails again
+        self.max_rate_limit_pause = 30.0  # longest pause between waves while most requests are rate limited
+        self.load_mined_blocks()
         
     def load_last_processed_block(self) -> int:
-        """Load the last processed block from file, or return default start block"""
+        """Load the last processed block from file, or return the block before the default start block"""
         if os.path.exists(self.last_processed_block_file):
             try:
                 with open(self.last_processed_block_file, 'r') as f:
                     data = json.load(f)
-                    return data.get('last_block', self.eth_block_start)
+                    return data.get('last_block', self.eth_block_start - 1)
             except (json.JSONDecodeError, KeyError):
                 print(f"Error reading {self.last_processed_block_file}, using default start block")
-                return self.eth_block_start
-        return self.eth_block_start
+                return self.eth_block_start - 1
+        return self.eth_block_start - 1
     
     def save_last_processed_block(self, block_number: int):
         """Save the last processed block to file"""
@@ -42,101 +91,523 @@ class EthereumBlockFetcher:
         with open(self.last_processed_block_file, 'w') as f:
             json.dump(data, f, indent=2)
     
-    def get_miner_address_from_topic(self, topic: str) -> str:
-        """Extract miner address from topic (assuming it's in the topic)"""
-        # Remove '0x' prefix and take the last 40 characters (20 bytes = address)
-        if topic.startswith('0x'):
-            topic = topic[2:]
-        # Ethereum addresses are 20 bytes, so last 40 hex characters
-        if len(topic) >= 40:
-            return '0x' + topic[-40:]
-        return topic
+    def load_mined_blocks(self):
+        """Load the mined blocks journaled by earlier runs, and the challenge they ended on"""
+        if os.path.exists(self.journal_file):
+            # (mined blocks, challenges, bytes) up to the end of the last complete write
+            intact = (0, 0, 0)
+            has_records = False
+            with open(self.journal_file, 'rb') as f:
+                offset = 0
+                for line in f:
+                    offset += len(line)
+                    try:
+                        # A line without its newline was cut short even if it happens to parse
+                        entry = json_loads(line) if line.endswith(b'\n') else None
+                    except json.JSONDecodeError:
+                        entry = None
+                    if entry is None:
+                        break
+                    if isinstance(entry, dict):
+                        self.journaled_block = entry['latest_block_number']
+                        has_records = True
+                        intact = (len(self.mined_blocks), len(self.challenges), offset)
+                    elif entry[3] == -1:
+                        block, tx_hash, miner, _ = entry
+                        self.challenges.append((block, tx_hash, miner, len(self.mined_blocks)))
+                    else:
+                        self.mined_blocks.append(entry)
+                        if not has_records:
+                            # Journals from before the coverage records end every write on an entry
+                            intact = (len(self.mined_blocks), len(self.challenges), offset)
+            # Drop whatever a write left without its closing record, markers included
+            intact_count, intact_challenges, intact_bytes = intact
+            del self.mined_blocks[intact_count:]
+            del self.challenges[intact_challenges:]
+            if intact_bytes < os.path.getsize(self.journal_file):
+                # A run stopped mid-write; cut the partial write off so the next append starts on a clean line
+                print(f"Dropping incomplete write at the end of {self.journal_file}")
+                with open(self.journal_file, 'r+b') as f:
+                    f.truncate(intact_bytes)
+            print(f"Loaded {len(self.mined_blocks)} mined blocks from {self.journal_file}")
+        self.journaled_count = len(self.mined_blocks)
+        
+        if os.path.exists(self.meta_file):
+            try:
+                with open(self.meta_file, 'r') as f:
+                    previous_challenge = json.load(f).get('previous_challenge')
+                if previous_challenge is not None:
+                    self.previous_challenge = bytes.fromhex(previous_challenge)
+            except (json.JSONDecodeError, ValueError):
+                print(f"Error reading {self.meta_file}, starting without a previous challenge")
+    
+    def previous_challenge_hex(self) -> Optional[str]:
+        """previous_challenge as un-prefixed hex, the form the website compares against"""
+        return self.previous_challenge.hex() if self.previous_challenge is not None else None
+    
+    def save_journal(self, latest_block_number: int):
+        """
+        Append the mined blocks added since the last call to the journal and refresh the metadata file
+        
+        Args:
+            latest_block_number: Last block the journaled mined blocks cover
+        """
+        if len(self.mined_blocks) == self.journaled_count:
+            return
+        
+        # Markers for the new entries sit at the end of challenges
+        markers = {}
+        for block, tx_hash, miner, index in reversed(self.challenges):
+            if index < self.journaled_count:
+                break
+            markers[index] = [block, tx_hash, miner, -1]
+        lines = []
+        for index in range(self.journaled_count, len(self.mined_blocks)):
+            if index in markers:
+                lines.append(json_dumps_bytes(markers[index]) + b'\n')
+            lines.append(json_dumps_bytes(self.mined_blocks[index]) + b'\n')
+        # The closing record lets a restart resume after this range without journaling it twice
+        lines.append(json_dumps_bytes({'latest_block_number': latest_block_number}) + b'\n')
+        with open(self.journal_file, 'ab') as f:
+            f.write(b''.join(lines))
+        self.journaled_count = len(self.mined_blocks)
+        self.journaled_block = latest_block_number
+        
+        meta = {
+            'total_blocks': len(self.mined_blocks) + len(self.challenges),
+            'last_updated': int(time.time()),
+            'latest_block_number': latest_block_number,
+            'previous_challenge': self.previous_challenge_hex()
+        }
+        with open(self.meta_file, 'w') as f:
+            json.dump(meta, f, indent=2)
     
-    def fetch_logs(self, start_block: int, end_block: int) -> List[Dict[str, Any]]:
+    async def fetch_logs_batch(self, session: aiohttp.ClientSession, ranges: List[Tuple[int, int]]) -> List[List[Dict[str, Any]]]:
         """
-        Fetch logs from Ethereum blockchain
+        Fetch logs for several block ranges with a single JSON-RPC batch request
         
         Args:
+            session: Shared aiohttp session for this run
+            ranges: (start_block, end_block) pairs
+            
+        Returns:
+            One list of log entries per range, in the same order as ranges
+        """
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "id": i,
+                "method": "eth_getLogs",
+                "params": [{
+                    "fromBlock": hex(start_block),
+                    "toBlock": hex(end_block),
+                    "address": self.bwork_contract_address,
+                    "topics": [self.mint_topic]
+                }]
+            }
+            for i, (start_block, end_block) in enumerate(ranges)
+        ]
+        # Encode and parse the bodies ourselves so orjson does the work when it is installed
+        async with session.post(self.rpc_url, data=json_dumps_bytes(payload), headers={"Content-Type": "application/json"}) as response:
+            if response.status == 429:
+                raise RateLimitError(f"HTTP 429 for blocks {ranges[0][0]} to {ranges[-1][1]}")
+            response.raise_for_status()
+            body = json_loads(await response.read())
+        # Batch replies may come back in any order
+        replies = {reply["id"]: reply for reply in body}
+        results = []
+        for i in range(len(ranges)):
+            reply = replies[i]
+            if "error" in reply:
+                if reply["error"].get("code") == 429:
+                    raise RateLimitError(reply["error"])
+                raise RuntimeError(reply["error"])
+            results.append([self.decode_raw_log(log) for log in reply["result"]])
+        
+        print(f"Got filter results: {sum(len(logs) for logs in results)} transactions from {len(ranges)} ranges")
+        return results
+    
+    @staticmethod
+    def decode_raw_log(log: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a raw JSON-RPC log into the fields process_logs reads, as plain bytes and ints"""
+        return {
+            'transactionHash': bytes.fromhex(log['transactionHash'][2:]),
+            'blockNumber': int(log['blockNumber'], 16),
+            # process_logs reads topics[1] and the first three data words, so leave the rest as hex
+            'topics': [bytes.fromhex(topic[2:]) for topic in log['topics'][:2]],
+            'data': bytes.fromhex(log['data'][2:2 + 2 * LOG_DATA_BYTES_USED])
+        }
+    
+    async def fetch_logs_batch_with_backoff(self, session: aiohttp.ClientSession, ranges: List[Tuple[int, int]],
+                                            retries: int = 6) -> List[List[Dict[str, Any]]]:
+        """
+        Fetch logs for several block ranges with fetch_logs_batch, resending the request after a
+        doubling pause while the endpoint rate limits it
+        
+        Args:
+            session: Shared aiohttp session for this run
+            ranges: (start_block, end_block) pairs
+            retries: Attempts before a rate-limited request gives up
+            
+        Returns:
+            One list of log entries per range, in the same order as ranges
+        """
+        pause = 1.0
+        for attempt in range(retries):
+            try:
+                return await self.fetch_logs_batch(session, ranges)
+            except RateLimitError as e:
+                if attempt == retries - 1:
+                    raise
+                print(f"Rate limited fetching blocks {ranges[0][0]} to {ranges[-1][1]}, retrying in {pause:.0f}s: {e}")
+                await asyncio.sleep(pause)
+                pause *= 2
+    
+    async def fetch_logs_splitting(self, session: aiohttp.ClientSession, start_block: int, end_block: int,
+                                   retries: int = 3) -> List[Dict[str, Any]]:
+        """
+        Fetch logs for a block range, halving the range and retrying when a request fails
+        
+        Args:
+            session: Shared aiohttp session for this run
             start_block: Starting block number
             end_block: Ending block number
+            retries: Attempts left once the range is down to a single block
             
         Returns:
-            List of log entries
+            List of log entries in block order
         """
         try:
-            logs = self.w3.eth.get_logs({
-                'fromBlock': start_block,
-                'toBlock': end_block,
-                'address': self.bwork_contract_address,
-                'topics': [self.mint_topic]
-            })
+            return (await self.fetch_logs_batch_with_backoff(session, [(start_block, end_block)]))[0]
+        except RateLimitError:
+            # Still rate limited after every pause; splitting would only send more requests
+            raise
+        except Exception as e:
+            print(f"Error fetching logs for blocks {start_block} to {end_block}: {e}")
+            await asyncio.sleep(1)
+            if start_block == end_block:
+                if retries <= 1:
+                    raise
+                return await self.fetch_logs_splitting(session, start_block, end_block, retries - 1)
+            # Smaller ranges get past result-size limits
+            middle = (start_block + end_block) // 2
+            return (
+                await self.fetch_logs_splitting(session, start_block, middle)
+                + await self.fetch_logs_splitting(session, middle + 1, end_block)
+            )
+    
+    async def fetch_logs_group(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                               index: int, ranges: List[Tuple[int, int]]) -> Tuple[int, Optional[List[List[Dict[str, Any]]]], float, bool, bool]:
+        """
+        Fetch a group of block ranges in one batch request; a failed group of single blocks falls back
+        to one request per block, since its ranges cannot get any smaller
+        
+        Args:
+            session: Shared aiohttp session for this run
+            semaphore: Bounds the number of requests in flight
+            index: Position of the group, returned with the results
+            ranges: (start_block, end_block) pairs
             
-            print(f"Got filter results: {len(logs)} transactions")
-            return logs
+        Returns:
+            index, one list of log entries per range in the same order as ranges (None if the group
+            failed and should be fetched again with smaller ranges), how long the batch request took,
+            whether it failed, and whether it was rate limited
+        """
+        async with semaphore:
+            started = time.monotonic()
+            rate_limited = False
+            try:
+                return index, await self.fetch_logs_batch(session, ranges), time.monotonic() - started, False, False
+            except RateLimitError as e:
+                rate_limited = True
+                error = e
+            except Exception as e:
+                error = e
+            duration = time.monotonic() - started
+            print(f"Error fetching batch for blocks {ranges[0][0]} to {ranges[-1][1]}: {error}")
+            if rate_limited:
+                # One request per range would only add to the load; pause and resend the same batch instead
+                await asyncio.sleep(1)
+                try:
+                    return index, await self.fetch_logs_batch_with_backoff(session, ranges), duration, True, True
+                except RateLimitError:
+                    raise
+                except Exception as e:
+                    print(f"Error fetching batch for blocks {ranges[0][0]} to {ranges[-1][1]}: {e}")
+            if any(start_block != end_block for start_block, end_block in ranges):
+                # Splitting every range here would cost a request per piece; the next wave retries
+                # these blocks with a smaller block range instead
+                return index, None, duration, True, rate_limited
+            results = [
+                await self.fetch_logs_splitting(session, start_block, end_block)
+                for start_block, end_block in ranges
+            ]
+            return index, results, duration, True, rate_limited
+    
+    async def fetch_and_process_groups(self, session: aiohttp.ClientSession,
+                                       groups: List[List[Tuple[int, int]]]) -> Tuple[Optional[int], float, float, float]:
+        """
+        Fetch the groups of block ranges concurrently and process them strictly in block order, up to
+        the first group that has to be fetched again
+        
+        Args:
+            session: Shared aiohttp session for this run
+            groups: Consecutive groups of (start_block, end_block) pairs
             
-        except Exception as e:
-            print(f"Error fetching logs: {e}")
-            return []
+        Returns:
+            First block left unprocessed (None if every group was processed), the duration of the slowest
+            batch request, the fraction of batch requests that failed, and the fraction that failed
+            because they were rate limited
+        """
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        tasks = [
+            asyncio.ensure_future(self.fetch_logs_group(session, semaphore, i, group))
+            for i, group in enumerate(groups)
+        ]
+        slowest = 0.0
+        failed_count = 0
+        rate_limited_count = 0
+        try:
+            completed = {}
+            next_index = 0
+            for next_done in asyncio.as_completed(tasks):
+                index, results, duration, failed, rate_limited = await next_done
+                completed[index] = results
+                slowest = max(slowest, duration)
+                failed_count += failed
+                rate_limited_count += rate_limited
+                
+                # Only advance over the contiguous prefix of finished groups so the saved block stays monotonic
+                while completed.get(next_index) is not None:
+                    for (batch_start, batch_end), logs in zip(groups[next_index], completed.pop(next_index)):
+                        print(f"Processing blocks {batch_start} to {batch_end}")
+                        
+                        # Process the range's transactions together
+                        self.process_logs(logs)
+                        
+                        # Save progress, journaling new entries first so a restart never skips them
+                        self.save_journal(batch_end)
+                        self.save_last_processed_block(batch_end)
+                    next_index += 1
+        finally:
+            # A failed group stops the run; drop the groups still pending
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        resume_block = groups[next_index][0][0] if next_index < len(groups) else None
+        return resume_block, slowest, failed_count / len(groups), rate_limited_count / len(groups)
     
-    def process_transaction(self, transaction: Dict[str, Any]):
-        """Process a single transaction and update mined_blocks"""
-        tx_hash = transaction['transactionHash'].hex()
-        block_number = int(transaction['blockNumber'])
-        
-        # Get miner address from topics[1]
-        miner_address = self.get_miner_address_from_topic(transaction['topics'][1].hex())
-        
-        # Process transaction data
-        data = transaction['data'].hex()
-        
-        # Extract amount (first 64 hex characters after '0x')
-        if len(data) >= 66:  # '0x' + 64 characters
-            data_amt_hex = data[2:66]  # Remove '0x' and take first 64 chars
-            data_amt = int(data_amt_hex, 16) / (10 ** 18)  # Convert to ETH
-        else:
-            data_amt = 0
-        
-        # Extract challenger (characters 130-194)
-        if len(data) >= 194:
-            challenger = data[130:194]
+    def next_block_range(self, block_range: int, max_block_range: int, slowest: float, failed_fraction: float,
+                         rate_limited_fraction: float, stalled: bool, ceiling: Optional[int], ceiling_held: bool,
+                         last_good: Optional[int]) -> int:
+        """
+        Pick the block range for the next wave of requests from how the last wave went
+        
+        Args:
+            block_range: Blocks per eth_getLogs call in the last wave
+            max_block_range: Largest range the endpoint accepts
+            slowest: Duration of the slowest batch request in the last wave
+            failed_fraction: Fraction of the last wave's batch requests that failed
+            rate_limited_fraction: Part of failed_fraction that failed because of rate limiting
+            stalled: Whether the last wave's first group failed, so the wave made no progress
+            ceiling: Smallest block range that failed, or None
+            ceiling_held: Whether the range must stay below ceiling; once the hold runs out it may reach ceiling again
+            last_good: Block range of the last wave without failures, or None
             
-            if self.previous_challenge != challenger:
+        Returns:
+            Blocks per eth_getLogs call for the next wave
+        """
+        if stalled or failed_fraction - rate_limited_fraction > 0.25:
+            # Dense or overloaded stretch: back off straight away, to a size that just worked if there is one
+            if last_good is not None and last_good < block_range:
+                return last_good
+            return max(1, block_range // 2)
+        if failed_fraction > 0:
+            # Rate limiting and occasional errors say nothing about the range size; just don't grow
+            return block_range
+        # Scale towards the target duration, growing at most 2x per wave so one fast empty wave does not overshoot
+        scaled = int(block_range * self.target_request_seconds / max(slowest, 0.001))
+        limit = min(max_block_range, block_range * 2)
+        if ceiling is not None:
+            # Close in on the size that failed by halving the gap, and stop once within an eighth of it;
+            # after the hold, try the failing size itself once more
+            if not ceiling_held:
+                limit = min(limit, ceiling)
+            elif ceiling - block_range <= ceiling // 8:
+                limit = min(limit, block_range)
+            else:
+                limit = min(limit, (block_range + ceiling) // 2)
+        return max(1, min(limit, scaled))
+    
+    async def fetch_and_process(self, start_block: int, end_block: int, max_block_range: int):
+        """
+        Fetch and process all logs from start_block to end_block in waves of concurrent batch requests,
+        resizing the block range between waves
+        
+        Args:
+            start_block: First block to fetch
+            end_block: Last block to fetch
+            max_block_range: Largest number of blocks per eth_getLogs call
+        """
+        wave_size = self.max_in_flight * self.ranges_per_request
+        block_range = max_block_range
+        ceiling = None
+        ceiling_waves_left = 0
+        ceiling_waves = self.block_range_ceiling_waves
+        last_good = None
+        rate_limit_pause = 0.0
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+            wave_start = start_block
+            while wave_start <= end_block:
+                ranges = []
+                while len(ranges) < wave_size and wave_start <= end_block:
+                    range_end = min(wave_start + block_range - 1, end_block)
+                    ranges.append((wave_start, range_end))
+                    wave_start = range_end + 1
+                groups = [ranges[i:i + self.ranges_per_request] for i in range(0, len(ranges), self.ranges_per_request)]
+                resume_block, slowest, failed_fraction, rate_limited_fraction = await self.fetch_and_process_groups(session, groups)
+                stalled = resume_block == ranges[0][0]
+                if resume_block is not None:
+                    # Fetch the failed group and everything after it again in the next wave
+                    wave_start = resume_block
+                
+                if rate_limited_fraction > 0.25:
+                    # Smaller ranges would mean more requests; slow down instead, doubling the pause each wave
+                    rate_limit_pause = min(self.max_rate_limit_pause, max(1.0, rate_limit_pause * 2))
+                    print(f"Rate limited, pausing {rate_limit_pause:.0f}s before the next wave")
+                    await asyncio.sleep(rate_limit_pause)
+                elif rate_limited_fraction == 0:
+                    rate_limit_pause = 0.0
+                
+                new_block_range = self.next_block_range(block_range, max_block_range, slowest, failed_fraction,
+                                                        rate_limited_fraction, stalled, ceiling,
+                                                        ceiling_waves_left > 0, last_good)
+                if new_block_range < block_range and failed_fraction > 0:
+                    # Shrunk after failures: keep the failing size off limits for a while, and for twice
+                    # as long each time it fails again after a hold ran out
+                    if ceiling is not None and ceiling_waves_left == 0:
+                        ceiling_waves *= 2
+                    ceiling = block_range if ceiling is None else min(ceiling, block_range)
+                    ceiling_waves_left = ceiling_waves
+                else:
+                    if failed_fraction == 0:
+                        last_good = block_range
+                        if ceiling is not None and block_range >= ceiling:
+                            # The size that failed works again, so the stretch that needed it is over
+                            ceiling = None
+                    ceiling_waves_left = max(0, ceiling_waves_left - 1)
+                if new_block_range != block_range:
+                    print(f"Adjusting block range from {block_range} to {new_block_range} (slowest request {slowest:.2f}s)")
+                    block_range = new_block_range
+    
+    def process_logs(self, logs: List[Dict[str, Any]]):
+        """
+        Process a range's logs in block order and update mined_blocks
+        
+        Args:
+            logs: Log entries from decode_raw_log (or w3.eth.get_logs), oldest first
+        """
+        if not logs:
+            return
+        
+        # Decode each field for the whole range in one pass: amount is data word 0, challenger is word 2,
+        # and the miner address is the last 20 bytes of topics[1]. bytes(...) also accepts HexBytes from a
+        # w3 log, whose own hex() may or may not carry a '0x' prefix depending on the installed version
+        from_bytes = int.from_bytes
+        wei_per_eth = self._WEI_PER_ETH
+        datas = [log['data'] for log in logs]
+        block_numbers = [int(log['blockNumber']) for log in logs]
+        tx_hashes = ['0x' + bytes(log['transactionHash']).hex() for log in logs]
+        miner_addresses = ['0x' + bytes(log['topics'][1][-20:]).hex() for log in logs]
+        amounts = [from_bytes(data[0:32], 'big') / wei_per_eth if len(data) >= 32 else 0 for data in datas]
+        challengers = [bytes(data[64:96]) if len(data) >= 96 else None for data in datas]
+        changed = self.find_challenge_changes(challengers).tolist()
+        
+        for block_number, tx_hash, miner_address, data_amt, challenger, challenge_changed in zip(
+            block_numbers, tx_hashes, miner_addresses, amounts, challengers, changed
+        ):
+            if challenge_changed:
                 previous_challenge2 = self.previous_challenge
-                print(f"Old challenge: {self.previous_challenge}, new challenge: {challenger}")
+                print(f"Old challenge: {previous_challenge2.hex() if previous_challenge2 is not None else None}, new challenge: {challenger.hex()}")
                 self.previous_challenge = challenger
                 
                 if previous_challenge2 is not None:
-                    # Create new block entry for challenge change
-                    first_block_num = self.mined_blocks[0][0] if self.mined_blocks else block_number
-                    new_block = [first_block_num, tx_hash, miner_address, -1]
-                    self.mined_blocks.insert(0, new_block)
+                    # Record the challenge change just before this log's entry
+                    first_block_num = self.mined_blocks[-1][0] if self.mined_blocks else block_number
+                    self.challenges.append((first_block_num, tx_hash, miner_address, len(self.mined_blocks)))
+            
+            # Add the actual mined block
+            self.mined_blocks.append([block_number, tx_hash, miner_address, data_amt])
+        self.dirty = True
+    
+    def find_challenge_changes(self, challengers: List[Optional[bytes]]) -> np.ndarray:
+        """
+        Mark which logs carry a different challenge from the log before them
         
-        # Add the actual mined block
-        self.mined_blocks.insert(0, [block_number, tx_hash, miner_address, data_amt])
+        Args:
+            challengers: 32-byte challenge of each log in order, or None for logs without one
+            
+        Returns:
+            Boolean array, True where the challenge changes (the first log is compared with previous_challenge)
+        """
+        has_challenge = np.array([challenger is not None for challenger in challengers], dtype=bool)
+        changed = np.zeros(len(challengers), dtype=bool)
+        present = [challenger for challenger in challengers if challenger is not None]
+        if not present:
+            return changed
+        
+        # Stack the challenges into a uint8[K, 32] array and compare every row with the one above it at once
+        column = np.frombuffer(b''.join(present), dtype=np.uint8).reshape(len(present), 32)
+        row_changed = np.empty(len(present), dtype=bool)
+        row_changed[0] = self.previous_challenge != present[0]
+        row_changed[1:] = (column[1:] != column[:-1]).any(axis=1)
+        changed[has_challenge] = row_changed
+        return changed
+    
+    def mined_blocks_newest_first(self) -> List[list]:
+        """mined_blocks in the published layout: newest first, with a -1 marker entry below each challenge change"""
+        markers = {index: [block, tx_hash, miner, -1] for block, tx_hash, miner, index in self.challenges}
+        published = []
+        for index in range(len(self.mined_blocks) - 1, -1, -1):
+            published.append(self.mined_blocks[index])
+            if index in markers:
+                published.append(markers[index])
+        return published
     
-    def save_mined_blocks_to_file(self, filename: str = "mined_blocks.json"):
-        """Save mined blocks to a JSON file that can be easily read by JavaScript"""
-        latest_block = self.w3.eth.get_block('latest')
+    def save_mined_blocks_to_file(self, latest_block_number: int, last_updated: int, filename: str = "mined_blocks.json"):
+        """
+        Save mined blocks to a JSON file that can be easily read by JavaScript
+        
+        Args:
+            latest_block_number: Last block the saved mined blocks cover
+            last_updated: Unix time of this update
+            filename: Output JSON file; the .js copy is written alongside it
+        """
+        published = self.mined_blocks_newest_first()
         output_data = {
-            'mined_blocks': self.mined_blocks,
-            'total_blocks': len(self.mined_blocks),
-            'last_updated': latest_block['timestamp'],
-            'latest_block_number': latest_block['number'],
+            'mined_blocks': published,
+            'total_blocks': len(published),
+            'last_updated': last_updated,
+            'latest_block_number': latest_block_number,
             'contract_address': self.bwork_contract_address,
             'mint_topic': self.mint_topic,
-            'previous_challenge': self.previous_challenge
+            'previous_challenge': self.previous_challenge_hex()
         }
+        # Both files are read by programs, so they get the same compact JSON, serialized once
+        payload = json_dumps_bytes(output_data)
         if(len(self.mined_blocks)>0):
-            with open(filename, 'w') as f:
-                json.dump(output_data, f, indent=2)
+            with open(filename, 'wb') as f:
+                f.write(payload)
         
-            print(f"Saved {len(self.mined_blocks)} mined blocks to {filename}")
+            print(f"Saved {len(published)} mined blocks to {filename}")
         
         # Also save as a simple JavaScript-compatible format
         js_filename = filename.replace('.json', '.js')
-        with open(js_filename, 'w') as f:
-            f.write(f"const minedBlocksData = {json.dumps(output_data, indent=2)};\n")
-            f.write("module.exports = minedBlocksData;\n")
+        with open(js_filename, 'wb') as f:
+            f.write(b"const minedBlocksData = ")
+            f.write(payload)
+            f.write(b";\n")
+            f.write(b"module.exports = minedBlocksData;\n")
         
         print(f"Saved JavaScript-compatible file: {js_filename}")
     
@@ -145,14 +616,16 @@ class EthereumBlockFetcher:
         Run the fetcher once
         
         Args:
-            batch_size: Number of blocks to process in each batch
+            batch_size: Largest number of blocks per eth_getLogs call; the range shrinks below it on slow or failing requests
         """
         try:
             print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Starting block fetch...")
             
-            # Load the last processed block
-            start_block = self.load_last_processed_block()
-            current_block = self.w3.eth.get_block('latest')['number']
+            # Resume after the last block scanned; the journal may cover more than the checkpoint
+            # when a run stopped between the two writes
+            start_block = max(self.load_last_processed_block(), self.journaled_block) + 1
+            # Only the number is needed, so skip fetching the whole latest block
+            current_block = self.w3.eth.block_number
             
             print(f"Starting from block: {start_block}")
             print(f"Current block: {current_block}")
@@ -161,29 +634,15 @@ class EthereumBlockFetcher:
                 print("Already up to date!")
                 return
             
-            # Process blocks in batches
-            current_start = start_block
+            # Pack ranges into JSON-RPC batch requests, fetch those concurrently, and process strictly in block order
+            asyncio.run(self.fetch_and_process(start_block, current_block, batch_size))
             
-            while current_start <= current_block:
-                current_end = min(current_start + batch_size - 1, current_block)
-                
-                print(f"Processing blocks {current_start} to {current_end}")
-                
-                # Fetch logs for this batch
-                logs = self.fetch_logs(current_start, current_end)
-                
-                # Process each transaction
-                for transaction in logs:
-                    self.process_transaction(transaction)
-                
-                # Save progress
-                self.save_last_processed_block(current_end)
-                
-                # Move to next batch
-                current_start = current_end + 1
-            
-            # Save final results
-            self.save_mined_blocks_to_file()
+            # Save final results, unless no new logs arrived since the last save
+            if not self.dirty:
+                print("No new mined blocks, skipping save")
+                return
+            self.save_mined_blocks_to_file(current_block, int(time.time()))
+            self.dirty = False
             print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Processing complete!")
             
         except Exception as e:
@@ -199,15 +658,13 @@ class EthereumBlockFetcher:
         """
         interval_seconds = interval_minutes * 60
         
-        while self.running:
+        while not self._stop.is_set():
             # Run the fetcher
             self.run_once(batch_size)
             
-            # Wait for the next interval or until stopped
-            for _ in range(interval_seconds):
-                if not self.running:
-                    break
-                time.sleep(1)
+            # Wait for the next interval; wait() returns True as soon as the scheduler is stopped
+            if self._stop.wait(interval_seconds):
+                return
     
     def start_scheduler(self, interval_minutes: int = 3, batch_size: int = 499):
         """
@@ -221,7 +678,15 @@ class EthereumBlockFetcher:
             print("Scheduler is already running!")
             return
         
+        if self.scheduler_thread is not None and self.scheduler_thread.is_alive():
+            # A stopped thread may still be inside run_once; a second thread started now would share
+            # mined_blocks, the journal and the checkpoint with it. Join in steps so Ctrl+C still works.
+            print("Waiting for the previous scheduler run to finish...")
+            while self.scheduler_thread.is_alive():
+                self.scheduler_thread.join(timeout=1)
+        
         self.running = True
+        self._stop.clear()
         self.scheduler_thread = threading.Thread(
             target=self.scheduler_loop,
             args=(interval_minutes, batch_size),
@@ -235,6 +700,7 @@ class EthereumBlockFetcher:
     def stop_scheduler(self):
         """Stop the scheduler"""
         self.running = False
+        self._stop.set()
         if self.scheduler_thread:
             self.scheduler_thread.join(timeout=5)
         print("Scheduler stopped.")
@@ -250,23 +716,24 @@ class EthereumBlockFetcher:
         self.start_scheduler(interval_minutes, batch_size)
         
         try:
-            # Keep the main thread alive
-            while self.running:
-                time.sleep(1)
+            # Keep the main thread alive until the scheduler is stopped. The wait is bounded because
+            # Ctrl+C cannot interrupt an untimed lock wait on Windows (bpo-29971)
+            while not self._stop.wait(1):
+                pass
         except KeyboardInterrupt:
             print("\nReceived interrupt signal...")
             self.stop_scheduler()
 
 # Usage examples
 if __name__ == "__main__":
-    while True:
-        try:
-        
-            # Initialize with your Ethereum RPC URL
-            RPC_URL = "https://base-sepolia.g.alchemy.com/v2/fTukefKxyH-72aDTEBUHqcad2_SK53CC"
+    # Initialize with your Ethereum RPC URL
+    RPC_URL = "https://base-sepolia.g.alchemy.com/v2/fTukefKxyH-72aDTEBUHqcad2_SK53CC"
     
-            fetcher = EthereumBlockFetcher(RPC_URL)
+    # Built once, so a restart after an error keeps the loaded history and open connections
+    fetcher = EthereumBlockFetcher(RPC_URL)
     
+    while True:
+        try:
             # Option 1: Run once manually
             # fetcher.run_once(batch_size=499)
     